@@ -1,8 +1,20 @@
 """
 Provides functionality for reading from/writing to the 3 index files used by
-indexer and querier in search
+indexer and querier in search, and the binary edge list used to calculate
+PageRank from disk
 """
 
+import heapq
+import json
+import os
+import tempfile
+import time
+from array import array
+
+# maximum number of sorted runs merged at once by write_edges_file
+MAX_MERGE_RUNS = 64
+
+
 def write_title_file(title: str, dictionary: dict):
     """
     Writes the dictionary of documents to titles into a file to be read in querying
@@ -105,4 +117,257 @@ def read_words_file(words: str, words_to_doc_relevance: dict):
                 relevance = float(split[i+1])
                 if word not in words_to_doc_relevance:
                     words_to_doc_relevance[word] = {}
-                words_to_doc_relevance[word][page_id] = relevance
\ No newline at end of file
+                words_to_doc_relevance[word][page_id] = relevance
+
+def write_stems_file(stems: str, words_to_stems: dict):
+    """
+    Writes the stem of every word seen while indexing, so that the querier can
+    stem common query words without loading NLTK's stemmer
+    output looks like:
+    word1 stem1
+    word2 stem2
+    :param stems: filepath to stems file
+    :param words_to_stems: dictionary of words --> stems
+    :return: n/a
+    """
+    with open(stems, "w") as stems_fh:
+        for word, stem in words_to_stems.items():
+            stems_fh.write(word + " " + stem + "\n")
+
+
+def read_stems_file(stems: str, words_to_stems: dict):
+    """
+    reads the stems written in stems into the words_to_stems dictionary
+    :param stems: filepath to stems file
+    :param words_to_stems: dictionary of words --> stems
+    :return: n/a
+    """
+    with open(stems, "r") as stems_fh:
+        for line in stems_fh:
+            split = line.split()
+            if len(split) == 2:
+                words_to_stems[split[0]] = split[1]
+
+
+def write_generation_file(generation: str, index_files: "list[str]"):
+    """
+    Marks the index files as one complete generation, once all of them are
+    written. The modification time and size of each file is recorded, so a
+    reader can tell whether the files on disk are still the ones this marker
+    was written for. The marker is written to a temporary file and renamed
+    into place, so it is never seen half written
+    output looks like:
+    {"time_ns": 1700000000000000000, "files": [[mtime1, size1], [mtime2, size2], [mtime3, size3]]}
+    :param generation: filepath to generation file
+    :param index_files: filepaths to the titles, docs and words files
+    :return: n/a
+    """
+    files = [[os.stat(path).st_mtime_ns, os.stat(path).st_size] for path in index_files]
+    fd, temp = tempfile.mkstemp(suffix=".generation", dir=os.path.dirname(os.path.abspath(generation)))
+    try:
+        with os.fdopen(fd, "w") as generation_fh:
+            generation_fh.write(json.dumps({ "time_ns": time.time_ns(), "files": files }) + "\n")
+        os.replace(temp, generation)
+    except BaseException:
+        os.remove(temp)
+        raise
+
+
+def read_generation_file(generation: str) -> dict:
+    """
+    reads the generation marker written in generation
+    :param generation: filepath to generation file
+    :return: dictionary with the marker's time_ns and the [mtime, size] of each index file
+    """
+    with open(generation, "r") as generation_fh:
+        return json.load(generation_fh)
+
+
+def write_links(links_fh, title: str, linked_titles):
+    """
+    Appends the links of one page to an open links file, which holds the link
+    graph on disk while the XML is parsed, before page positions are known
+    output looks like (one JSON list per line, as titles may hold any character):
+    ["title1", "linked title1_1"]
+    ["title1", "linked title1_2"]
+    :param links_fh: links file opened for writing
+    :param title: title of the page containing the links
+    :param linked_titles: titles the page links to
+    :return: n/a
+    """
+    for linked_title in linked_titles:
+        links_fh.write(json.dumps([title, linked_title]) + "\n")
+
+
+def read_links_file(links: str):
+    """
+    reads the links written in links one at a time
+    :param links: filepath to links file
+    :return: generator of (title, linked title) pairs
+    """
+    with open(links, "r") as links_fh:
+        for line in links_fh:
+            if line.strip() == "":
+                continue
+            title, linked_title = json.loads(line)
+            yield (title, linked_title)
+
+
+def write_edges_file(edges: str, all_edges, chunk_size: int = 1000000):
+    """
+    Writes the link graph as a compact binary edge list, sorted by destination
+    (then source), to be streamed from disk when calculating PageRank.
+    Sorting is done externally: at most chunk_size edges are held in memory,
+    each sorted chunk is spilled to a temporary run file, and whenever
+    MAX_MERGE_RUNS runs pile up they are merged into one bigger run, so neither
+    the read buffers nor the list of runs grows with the number of edges
+    output looks like (native-endian 4-byte ints, no separators):
+    src1 dst1 src2 dst2 ...
+    :param edges: filepath to edges file
+    :param all_edges: iterable of (source position, destination position) pairs
+    :param chunk_size: maximum number of edges held in memory at once
+    :return: n/a
+    """
+    directory = os.path.dirname(os.path.abspath(edges))
+    levels = [] # lists of run filepaths, where runs at level i hold about MAX_MERGE_RUNS^i chunks
+    chunk = []
+
+    try:
+        for src, dst in all_edges:
+            chunk.append((dst, src))
+            if len(chunk) >= chunk_size:
+                run = write_edge_run(directory, chunk)
+                chunk = [] # freed before add_edge_run may merge a level
+                add_edge_run(levels, run, directory, chunk_size)
+
+        if len(levels) == 0:
+            chunk.sort()
+            with open(edges, "wb") as edges_fh:
+                array("i", [v for (dst, src) in chunk for v in (src, dst)]).tofile(edges_fh)
+            return
+
+        if len(chunk) > 0:
+            run = write_edge_run(directory, chunk)
+            chunk = []
+            add_edge_run(levels, run, directory, chunk_size)
+
+        # merge the leftover runs of each level, from the smallest runs up
+        for i in range(len(levels) - 1):
+            if len(levels[i]) > 0:
+                levels[i + 1].append(merge_edge_level(levels[i], directory, chunk_size))
+                levels[i] = []
+
+        merge_edge_runs(levels[-1], edges, chunk_size)
+    finally:
+        for level in levels:
+            for run in level:
+                if os.path.exists(run):
+                    os.remove(run)
+
+
+def add_edge_run(levels: "list[list[str]]", run: str, directory: str, chunk_size: int):
+    """
+    Adds a sorted run to the lowest level, merging a level into one run on the
+    next level up whenever it reaches MAX_MERGE_RUNS runs
+    :param levels: lists of run filepaths by level
+    :param run: filepath of the new sorted run
+    :param directory: directory to create merged runs in
+    :param chunk_size: maximum number of edges held in memory at once
+    :return: n/a
+    """
+    i = 0
+    while True:
+        if len(levels) == i:
+            levels.append([])
+        levels[i].append(run)
+        if len(levels[i]) < MAX_MERGE_RUNS:
+            return
+        run = merge_edge_level(levels[i], directory, chunk_size)
+        levels[i] = []
+        i += 1
+
+
+def merge_edge_level(runs: "list[str]", directory: str, chunk_size: int) -> str:
+    """
+    Merges sorted runs into one new temporary run, removing the merged runs
+    :param runs: filepaths of the sorted run files
+    :param directory: directory to create the merged run in
+    :param chunk_size: maximum number of edges held in memory at once
+    :return: filepath of the merged run
+    """
+    fd, merged_run = tempfile.mkstemp(suffix=".edges", dir=directory)
+    os.close(fd)
+    merge_edge_runs(runs, merged_run, chunk_size)
+    for run in runs:
+        os.remove(run)
+    return merged_run
+
+
+def merge_edge_runs(runs: "list[str]", edges: str, chunk_size: int):
+    """
+    Merges sorted run files into one sorted edges file. The runs share a read
+    buffer of chunk_size edges, so memory does not grow with the size of the runs
+    :param runs: filepaths of the sorted run files
+    :param edges: filepath the merged edges are written to
+    :param chunk_size: maximum number of edges held in memory at once
+    :return: n/a
+    """
+    run_chunk_size = max(1, chunk_size // len(runs))
+    merged = heapq.merge(*[read_edge_pairs(run, run_chunk_size) for run in runs], \
+        key=lambda edge: (edge[1], edge[0]))
+
+    with open(edges, "wb") as edges_fh:
+        buffer = array("i")
+        for src, dst in merged:
+            buffer.append(src)
+            buffer.append(dst)
+            if len(buffer) >= 2 * chunk_size:
+                buffer.tofile(edges_fh)
+                buffer = array("i")
+        buffer.tofile(edges_fh)
+
+
+def write_edge_run(directory: str, chunk: list) -> str:
+    """
+    Sorts a chunk of (destination, source) pairs and spills it to a temporary
+    file in the edges file format, used by write_edges_file for external sorting
+    :param directory: directory to create the temporary file in
+    :param chunk: list of (destination position, source position) pairs
+    :return: filepath of the temporary run file
+    """
+    chunk.sort()
+    fd, run = tempfile.mkstemp(suffix=".edges", dir=directory)
+    with os.fdopen(fd, "wb") as run_fh:
+        array("i", [v for (dst, src) in chunk for v in (src, dst)]).tofile(run_fh)
+    return run
+
+
+def read_edges_file(edges: str, chunk_size: int = 1000000):
+    """
+    reads the binary edge list written in edges one chunk at a time, so that
+    only chunk_size edges are held in memory at once
+    :param edges: filepath to edges file
+    :param chunk_size: maximum number of edges per chunk
+    :return: generator of arrays of ints laid out as src1 dst1 src2 dst2 ...
+    """
+    item_size = array("i").itemsize
+    # reads are already chunked, so skip the file object's own buffer
+    with open(edges, "rb", buffering=0) as edges_fh:
+        while True:
+            data = edges_fh.read(2 * chunk_size * item_size)
+            if len(data) == 0:
+                break
+            chunk = array("i")
+            chunk.frombytes(data)
+            yield chunk
+
+
+def read_edge_pairs(edges: str, chunk_size: int = 1000000):
+    """
+    reads the binary edge list written in edges one (src, dst) pair at a time
+    :param edges: filepath to edges file
+    :param chunk_size: maximum number of edges read from disk at once
+    :return: generator of (source position, destination position) pairs
+    """
+    for chunk in read_edges_file(edges, chunk_size):
+        yield from zip(chunk[0::2], chunk[1::2])
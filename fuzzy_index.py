@@ -0,0 +1,178 @@
+import time
+
+
+class FuzzyIndex:
+    ''' Class for finding the nearest vocabulary terms to a misspelled term using symmetric deletes '''
+
+    def __init__(self, max_distance: int = 2, prefix_length: int = 7):
+        '''
+        Constructor for the FuzzyIndex class
+
+        Parameters:
+        max_distance (int) -- largest edit distance at which a vocabulary term is suggested
+        prefix_length (int) -- only this many leading characters of a term generate deletes
+        '''
+
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.deletes = {} # dict mapping delete variants -> lists of vocabulary terms
+        self.frequencies = {} # dict mapping vocabulary terms -> number of documents containing them
+
+
+    def build(self, all_relevances: "dict[str, dict[int, float]]"):
+        '''
+        Adds every term of an index's vocabulary to the fuzzy index
+
+        Parameters:
+        all_relevances (dict[str, dict[int, float]]) -- dict mapping words -> dicts mapping ids -> relevances
+        '''
+
+        for word in all_relevances:
+            self.add_term(word, len(all_relevances[word]))
+
+
+    def add_term(self, term: str, frequency: int):
+        '''
+        Adds a vocabulary term under every delete variant of its prefix
+
+        Parameters:
+        term (str) -- vocabulary term to add
+        frequency (int) -- number of documents containing the term, used to break ties
+        '''
+
+        if term not in self.frequencies:
+            for variant in self.generate_deletes(term[:self.prefix_length]):
+                self.deletes.setdefault(variant, []).append(term)
+
+        self.frequencies[term] = frequency
+
+
+    def generate_deletes(self, word: str) -> "set[str]":
+        '''
+        Produces every string obtained by deleting up to max_distance characters from a word
+
+        Parameters:
+        word (str) -- word to delete characters from
+
+        Returns:
+        (set[str]) -- the word and all of its delete variants
+        '''
+
+        variants = { word }
+        level = { word }
+
+        for _ in range(self.max_distance):
+            next_level = set()
+            for variant in level:
+                for i in range(len(variant)):
+                    next_level.add(variant[:i] + variant[i + 1:])
+            next_level -= variants
+            variants |= next_level
+            level = next_level
+
+        return variants
+
+
+    def lookup(self, term: str, max_expansions: int = 3, max_lookups: int = 500, \
+        time_budget: float = 0.01) -> "list[str]":
+        '''
+        Finds the vocabulary terms nearest to a term. Delete variants of the term are looked
+        up level by level (one deleted character per level), so every term within distance d
+        is found by the end of level d and the search stops at the first level finding any.
+        Only the terms tied at the smallest distance are returned, so a closer correction is
+        never diluted by farther ones
+
+        Parameters:
+        term (str) -- term to find suggestions for
+        max_expansions (int) -- maximum number of suggestions to return
+        max_lookups (int) -- maximum number of delete variants to look up
+        time_budget (float) -- maximum number of seconds to spend searching
+
+        Returns:
+        (list[str]) -- nearest suggestions, ordered by number of documents
+        '''
+
+        deadline = time.perf_counter() + time_budget
+        prefix = term[:self.prefix_length]
+        distances = {}
+        lookups = 0
+        seen = { prefix }
+        level = [prefix]
+
+        for depth in range(self.max_distance + 1):
+            for variant in level:
+                if lookups >= max_lookups or time.perf_counter() > deadline:
+                    return self.best_suggestions(distances, max_expansions)
+                lookups += 1
+
+                for suggestion in self.deletes.get(variant, []):
+                    if suggestion not in distances:
+                        distances[suggestion] = self.edit_distance(term, suggestion, self.max_distance)
+
+            if any(d <= depth for d in distances.values()):
+                break
+
+            next_level = []
+            for variant in level:
+                for i in range(len(variant)):
+                    deleted = variant[:i] + variant[i + 1:]
+                    if deleted not in seen:
+                        seen.add(deleted)
+                        next_level.append(deleted)
+            level = next_level
+
+        return self.best_suggestions(distances, max_expansions)
+
+
+    def best_suggestions(self, distances: "dict[str, int]", max_expansions: int) -> "list[str]":
+        '''
+        Picks the suggestions tied at the smallest distance within max_distance
+
+        Parameters:
+        distances (dict[str, int]) -- dict mapping candidate terms -> edit distances
+        max_expansions (int) -- maximum number of suggestions to return
+
+        Returns:
+        (list[str]) -- nearest suggestions, ordered by number of documents
+        '''
+
+        nearest = min(distances.values(), default=self.max_distance + 1)
+        matches = [word for word in distances if distances[word] == nearest and nearest <= self.max_distance]
+        matches.sort(key=lambda word: (-self.frequencies[word], word))
+
+        return matches[:max_expansions]
+
+
+    def edit_distance(self, s1: str, s2: str, max_distance: int) -> int:
+        '''
+        Calculates the edit distance (insertions, deletions, substitutions and adjacent
+        transpositions) between two strings, giving up once it exceeds max_distance
+
+        Parameters:
+        s1 (str) -- first string
+        s2 (str) -- second string
+        max_distance (int) -- largest distance of interest
+
+        Returns:
+        (int) -- edit distance, or max_distance + 1 if it is larger than max_distance
+        '''
+
+        if abs(len(s1) - len(s2)) > max_distance:
+            return max_distance + 1
+
+        two_back = None
+        prev = list(range(len(s2) + 1))
+
+        for i in range(1, len(s1) + 1):
+            curr = [i] + [0] * len(s2)
+            for j in range(1, len(s2) + 1):
+                cost = 0 if s1[i - 1] == s2[j - 1] else 1
+                curr[j] = min(prev[j] + 1, curr[j - 1] + 1, prev[j - 1] + cost)
+                if i > 1 and j > 1 and s1[i - 1] == s2[j - 2] and s1[i - 2] == s2[j - 1]:
+                    curr[j] = min(curr[j], two_back[j - 2] + 1)
+            if min(curr) > max_distance:
+                return max_distance + 1
+            two_back = prev
+            prev = curr
+
+        return min(prev[-1], max_distance + 1)
@@ -1,6 +1,9 @@
 import sys
 import xml.etree.ElementTree as et
 import math
+import mmap
+import os
+import tempfile
 import file_io
 from text_processor import TextProcessor
 
@@ -17,6 +20,7 @@ class Index:
         self.all_relevances = {} # dict mapping words -> dicts mapping ids -> relevances
         self.page_weights = {} # dict mapping titles -> dicts mapping titles -> weights
         self.page_ranks = {} # dict mapping ids -> page ranks
+        self.edges_file = None # filepath of the on-disk edge list, if PageRank is streamed from disk
         self.processor = TextProcessor() 
 
 
@@ -26,18 +30,36 @@ class Index:
         xml_filepath = sys.argv[1]
         root = et.parse(xml_filepath).getroot()
         all_pages = root.findall("page")
-
-        for doc in all_pages:
-            doc_id = int(doc.find("id").text)
-            title = doc.find("title").text.strip().lower()
-            self.titles_to_ids[title] = doc_id
-            self.page_weights[title] = {}
-
-            processed_text = self.process_text(title, doc.find("text").text)
-            self.titles_to_processed_text[title] = processed_text
-
-        self.calculate_relevance()
-        self.calculate_page_ranks()
+        links_fh = None
+
+        if self.edges_file is not None:
+            # the link graph is spilled to disk page by page instead of kept in page_weights
+            links_fh = tempfile.NamedTemporaryFile("w", suffix=".links", delete=False, \
+                dir=os.path.dirname(os.path.abspath(self.edges_file)))
+
+        try:
+            for doc in all_pages:
+                doc_id = int(doc.find("id").text)
+                title = doc.find("title").text.strip().lower()
+                self.titles_to_ids[title] = doc_id
+                self.page_weights[title] = {}
+
+                processed_text = self.process_text(title, doc.find("text").text)
+                self.titles_to_processed_text[title] = processed_text
+
+                if links_fh is not None:
+                    file_io.write_links(links_fh, title, self.page_weights.pop(title))
+
+            self.calculate_relevance()
+            if links_fh is None:
+                self.calculate_page_ranks()
+            else:
+                links_fh.close()
+                self.calculate_page_ranks_on_disk(self.edges_file, links_file=links_fh.name)
+        finally:
+            if links_fh is not None:
+                links_fh.close()
+                os.remove(links_fh.name)
 
         self.titles_to_ids = { v:k for (k, v) in self.titles_to_ids.items() }
 
@@ -149,6 +171,123 @@ class Index:
         self.page_ranks = { self.titles_to_ids[k]:v for (k, v) in curr_row.items() }
 
 
+    def calculate_page_ranks_on_disk(self, edges_file: str, chunk_size: int = 1000000, links_file: str = None):
+        '''
+        Calculates the same PageRanks as calculate_page_ranks, without building the
+        n x n weight matrix. The link graph is written to edges_file as a binary edge
+        list sorted by destination and streamed from disk on every iteration, and the
+        rank and out-degree vectors are memory-mapped. When the links are read from a
+        links file, memory for the link graph is bounded by chunk_size edges plus a
+        map from titles to positions, whatever the number of links
+
+        Parameters:
+        edges_file (str) -- filepath the binary edge list is written to
+        chunk_size (int) -- maximum number of edges held in memory at once
+        links_file (str) -- filepath of the links spilled while parsing, or None to use page_weights
+        '''
+
+        positions = { title: i for (i, title) in enumerate(self.titles_to_ids) }
+        n = len(positions)
+        self.page_ranks = {}
+
+        if n == 0:
+            return
+
+        epsilon = 0.15
+        delta = 0.001
+
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(edges_file))) as work_dir:
+            out_degree_map = self.map_vector(os.path.join(work_dir, "out_degree"), n)
+            prev_map = self.map_vector(os.path.join(work_dir, "prev_row"), n)
+            curr_map = self.map_vector(os.path.join(work_dir, "curr_row"), n)
+            out_degree = memoryview(out_degree_map).cast("d")
+            prev_row = memoryview(prev_map).cast("d")
+            curr_row = memoryview(curr_map).cast("d")
+
+            try:
+                if links_file is None:
+                    links = ((title, linked_title) for title in self.page_weights \
+                        for linked_title in self.page_weights[title])
+                else:
+                    links = file_io.read_links_file(links_file)
+
+                file_io.write_edges_file(edges_file, self.generate_edges(links, positions, out_degree), chunk_size)
+
+                for i in range(n):
+                    curr_row[i] = 1 / n
+
+                while math.sqrt(sum(pow(p - c, 2) for (p, c) in zip(prev_row, curr_row))) > delta:
+                    prev_row, curr_row = curr_row, prev_row
+
+                    # every page gives epsilon / n to every page, and pages linking to nothing
+                    # give (1 - epsilon) / (n - 1) to every page except themselves
+                    total = sum(prev_row)
+                    dangling = 0
+                    if n > 1:
+                        for i in range(n):
+                            if out_degree[i] == 0:
+                                dangling += prev_row[i]
+                        dangling *= (1 - epsilon) / (n - 1)
+
+                    for i in range(n):
+                        curr_row[i] = (epsilon / n) * total + dangling
+                        if n > 1 and out_degree[i] == 0:
+                            curr_row[i] -= ((1 - epsilon) / (n - 1)) * prev_row[i]
+
+                    for src, dst in file_io.read_edge_pairs(edges_file, chunk_size):
+                        curr_row[dst] += ((1 - epsilon) / out_degree[src]) * prev_row[src]
+
+                self.page_ranks = { self.titles_to_ids[title]: curr_row[positions[title]] \
+                    for title in positions }
+            finally:
+                out_degree.release()
+                prev_row.release()
+                curr_row.release()
+                out_degree_map.close()
+                prev_map.close()
+                curr_map.close()
+
+
+    def generate_edges(self, links: "Iterator[tuple[str, str]]", positions: "dict[str, int]", \
+        out_degree) -> "Iterator[tuple[int, int]]":
+        '''
+        Produces the edges of the link graph as (source, destination) positions, ignoring
+        links to pages outside the corpus and links from a page to itself, and counts each
+        page's out-degree (its nk) along the way
+
+        Parameters:
+        links (Iterator[tuple[str, str]]) -- (title, linked title) pairs, each page's links unique
+        positions (dict[str, int]) -- dict mapping titles -> positions in the rank vectors
+        out_degree (memoryview) -- vector of out-degrees to populate, indexed by position
+
+        Returns:
+        (Iterator[tuple[int, int]]) -- edges of the link graph
+        '''
+
+        for start_title, end_title in links:
+            if end_title in positions and end_title != start_title:
+                start = positions[start_title]
+                out_degree[start] += 1
+                yield (start, positions[end_title])
+
+
+    def map_vector(self, path: str, n: int) -> mmap.mmap:
+        '''
+        Creates a zeroed file holding n floats and memory-maps it
+
+        Parameters:
+        path (str) -- filepath of the vector's backing file
+        n (int) -- number of floats in the vector
+
+        Returns:
+        (mmap.mmap) -- memory map of the vector's backing file
+        '''
+
+        with open(path, "wb+") as vector_fh:
+            vector_fh.truncate(n * 8)
+            return mmap.mmap(vector_fh.fileno(), n * 8)
+
+
     def calculate_weights(self):
         ''' Calculates and populates page_weights '''
 
@@ -214,14 +353,19 @@ class Index:
 
 if __name__ == "__main__": 
     try:
-        if len(sys.argv) != 5:
+        if len(sys.argv) != 5 and len(sys.argv) != 6:
             print("Incorrect input, try again")
             quit()
         index = Index()
+        if len(sys.argv) == 6:
+            index.edges_file = sys.argv[5]
         index.process_xml()
         
         file_io.write_title_file(sys.argv[2], index.titles_to_ids)
         file_io.write_docs_file(sys.argv[3], index.page_ranks)
         file_io.write_words_file(sys.argv[4], index.all_relevances)
+        file_io.write_stems_file(sys.argv[4] + ".stems", index.processor.stems)
+        # written last, so a watching querier only loads the files once all of them are complete
+        file_io.write_generation_file(sys.argv[4] + ".generation", sys.argv[2:5])
     except IOError:
         print("Incorrect input, try again")
\ No newline at end of file
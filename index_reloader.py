@@ -0,0 +1,205 @@
+import os
+import sys
+import threading
+import time
+import traceback
+import file_io
+
+class IndexReloader:
+    ''' Class for loading new generations of the index files in the background and swapping them into a running querier '''
+
+    def __init__(self, query_factory, titles: str, docs: str, words: str, poll_interval: float = 1.0):
+        '''
+        Constructor for IndexReloader
+
+        Parameters:
+        query_factory (callable) -- creates the empty Query each index generation is loaded into
+        titles (str) -- filepath to titles file
+        docs (str) -- filepath to docs file
+        words (str) -- filepath to words file
+        poll_interval (float) -- number of seconds between checks for a new index generation
+        '''
+
+        self.query_factory = query_factory
+        self.titles = titles
+        self.docs = docs
+        self.words = words
+        self.generation_file = words + ".generation" # marker the indexer writes once all 3 files are complete
+        self.poll_interval = poll_interval
+        self.current = None # Query answering new queries
+        self.generation = None # generation of the index files current was loaded from
+        self.reload_times = [] # seconds taken by each reload
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+
+    def index_generation(self) -> "int | None":
+        '''
+        Identifies the complete generation of the index files on disk from the generation
+        marker the indexer writes after them. The generation is only valid while the
+        modification times and sizes of the index files still match the ones the marker
+        recorded, so files the indexer has started rewriting are never mixed with old ones
+
+        Returns:
+        (int | None) -- the time the marker was written, or None if there is no complete generation
+        '''
+
+        try:
+            marker = file_io.read_generation_file(self.generation_file)
+            files = [[os.stat(path).st_mtime_ns, os.stat(path).st_size] \
+                for path in (self.titles, self.docs, self.words)]
+        except (OSError, ValueError):
+            return None
+
+        if not isinstance(marker, dict) or marker.get("files") != files:
+            return None
+
+        return marker.get("time_ns")
+
+
+    def resident_memory(self) -> "int | None":
+        '''
+        Reads how much memory the process currently has resident, from /proc/self/statm
+
+        Returns:
+        (int | None) -- resident memory in bytes, or None where /proc is not available
+        '''
+
+        try:
+            with open("/proc/self/statm", "r") as statm_fh:
+                return int(statm_fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            return None
+
+
+    def load(self) -> "Query":
+        '''
+        Loads the index files into a new Query, without touching the one answering queries
+
+        Returns:
+        (Query) -- querier for the index files on disk
+        '''
+
+        q = self.query_factory()
+        file_io.read_title_file(self.titles, q.ids_to_titles)
+        file_io.read_docs_file(self.docs, q.page_ranks)
+        file_io.read_words_file(self.words, q.all_relevances)
+
+        if q.ids_to_titles.keys() != q.page_ranks.keys():
+            raise ValueError("titles and docs files do not describe the same documents")
+
+        q.build_postings()
+
+        if self.current is None:
+            # the first load is on the way to the first prompt, so the fuzzy index is built behind it
+            q.build_fuzzy_index_in_background()
+        else:
+            q.build_fuzzy_index()
+
+        return q
+
+
+    def reload(self) -> bool:
+        '''
+        Loads the index files and atomically swaps them in for new queries. Queries already
+        running keep their reference to the old Query and finish against the old index,
+        which is freed once they are done. If the generation on disk changed while loading,
+        the loaded files may be a mix of two generations, so the old index is kept instead.
+        The reload time, and the resident memory while both indexes are loaded, are
+        reported on stderr
+
+        Returns:
+        (bool) -- true if the loaded index was swapped in, false otherwise
+        '''
+
+        generation = self.index_generation()
+        start = time.perf_counter()
+        memory_before = self.resident_memory()
+
+        q = self.load()
+
+        elapsed = time.perf_counter() - start
+        # measured before the swap, while the old index is still referenced by current
+        memory_both = self.resident_memory()
+
+        if self.current is not None and self.index_generation() != generation:
+            print("\nindex files changed while reloading, keeping the old index", file=sys.stderr)
+            return False
+
+        with self.lock:
+            swapped = self.current is not None
+            self.current = q
+            self.generation = generation
+            self.reload_times.append(elapsed)
+
+        if swapped and memory_before is not None and memory_both is not None:
+            print("\nindex reloaded in %.2fs (%.1fMB resident with both indexes loaded, %.1fMB more than before)" \
+                % (elapsed, memory_both / (1024 * 1024), (memory_both - memory_before) / (1024 * 1024)), \
+                file=sys.stderr)
+        elif swapped:
+            print("\nindex reloaded in %.2fs" % elapsed, file=sys.stderr)
+
+        return True
+
+
+    def get_query(self) -> "Query":
+        '''
+        Produces the Query that new queries should run against
+
+        Returns:
+        (Query) -- querier for the newest loaded index generation
+        '''
+
+        with self.lock:
+            return self.current
+
+
+    def poll(self) -> bool:
+        '''
+        Checks the generation marker for a new complete index generation and reloads it
+
+        Returns:
+        (bool) -- true if a new index generation was swapped in, false otherwise
+        '''
+
+        generation = self.index_generation()
+
+        if generation is None or generation == self.generation:
+            return False
+
+        try:
+            return self.reload()
+        except Exception as e:
+            # keep answering from the old index and retry once the indexer writes a new generation
+            self.generation = generation
+            print("\nindex reload failed, keeping the old index:", repr(e), file=sys.stderr)
+            return False
+
+
+    def watch(self):
+        ''' Polls for new index generations until stop is called, logging any error instead of stopping '''
+
+        while not self.stop_event.wait(self.poll_interval):
+            try:
+                self.poll()
+            except Exception:
+                print("\nindex watcher error, still watching:", file=sys.stderr)
+                traceback.print_exc()
+
+
+    def start(self):
+        ''' Starts watching for new index generations on a background thread '''
+
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.watch, daemon=True)
+        self.thread.start()
+
+
+    def stop(self):
+        ''' Stops watching for new index generations '''
+
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
@@ -0,0 +1,135 @@
+"""
+Provides set operations over doc-id-sorted postings lists used by the querier
+to evaluate boolean queries (AND, OR, NOT, +term, -term)
+"""
+
+import math
+
+
+def skip_length(postings: "list[int]") -> int:
+    """
+    Computes the skip pointer stride for a postings list, which is the square
+    root of its length (the usual choice, balancing skip count and skip size)
+    :param postings: doc-id-sorted postings list
+    :return: distance between consecutive skip pointers (at least 1)
+    """
+    return max(1, int(math.sqrt(len(postings))))
+
+
+def gallop_to(postings: "list[int]", target: int, start: int) -> int:
+    """
+    Finds the first position at or after start whose doc id is >= target by
+    galloping (doubling the step) and then binary searching the final step
+    :param postings: doc-id-sorted postings list
+    :param target: doc id to search for
+    :param start: position to start searching from
+    :return: position of the first doc id >= target, or len(postings) if none
+    """
+    n = len(postings)
+    if start >= n or postings[start] >= target:
+        return start
+
+    low = start
+    step = 1
+    high = start + step
+    while high < n and postings[high] < target:
+        low = high
+        step *= 2
+        high = start + step
+
+    high = min(high, n)
+    # postings[low] < target, and postings[high] >= target (or high == n)
+    while low + 1 < high:
+        mid = (low + high) // 2
+        if postings[mid] < target:
+            low = mid
+        else:
+            high = mid
+    return high
+
+
+def intersect(all_postings: "list[list[int]]") -> "list[int]":
+    """
+    Intersects several doc-id-sorted postings lists. The smallest list drives
+    the intersection, and the others are advanced with skip pointers, so the
+    work done is proportional to the smallest list rather than the largest
+    :param all_postings: list of doc-id-sorted postings lists
+    :return: doc-id-sorted list of ids contained in every postings list
+    """
+    if len(all_postings) == 0:
+        return []
+
+    ordered = sorted(all_postings, key=len)
+    result = ordered[0]
+
+    for other in ordered[1:]:
+        if len(result) == 0:
+            break
+        result = intersect_two(result, other)
+
+    return list(result)
+
+
+def intersect_two(smaller: "list[int]", larger: "list[int]") -> "list[int]":
+    """
+    Intersects two doc-id-sorted postings lists, following skip pointers in
+    the larger list whenever the skipped-to doc id does not overshoot
+    :param smaller: the shorter doc-id-sorted postings list
+    :param larger: the longer doc-id-sorted postings list
+    :return: doc-id-sorted list of ids contained in both lists
+    """
+    result = []
+    skip = skip_length(larger)
+    i = 0
+    j = 0
+
+    while i < len(smaller) and j < len(larger):
+        if smaller[i] == larger[j]:
+            result.append(smaller[i])
+            i += 1
+            j += 1
+        elif larger[j] < smaller[i]:
+            # skip pointers sit on every skip-th position of the larger list
+            if j % skip == 0 and j + skip < len(larger) and larger[j + skip] <= smaller[i]:
+                j += skip
+            else:
+                j += 1
+        else:
+            i += 1
+
+    return result
+
+
+def subtract(postings: "list[int]", excluded: "list[int]") -> "list[int]":
+    """
+    Removes every doc id in excluded from postings, galloping through the
+    excluded list so that a long excluded list is not scanned one id at a time
+    :param postings: doc-id-sorted postings list to filter
+    :param excluded: doc-id-sorted postings list of ids to remove
+    :return: doc-id-sorted list of ids in postings but not in excluded
+    """
+    if len(excluded) == 0:
+        return list(postings)
+
+    result = []
+    j = 0
+
+    for doc_id in postings:
+        j = gallop_to(excluded, doc_id, j)
+        if j == len(excluded) or excluded[j] != doc_id:
+            result.append(doc_id)
+
+    return result
+
+
+def union(all_postings: "list[list[int]]") -> "list[int]":
+    """
+    Merges several doc-id-sorted postings lists
+    :param all_postings: list of doc-id-sorted postings lists
+    :return: doc-id-sorted list of ids contained in any postings list
+    """
+    merged = set()
+    for postings in all_postings:
+        merged.update(postings)
+
+    return sorted(merged)
@@ -1,6 +1,13 @@
 from typing import IO
+import contextlib
 import file_io
+import os
+import postings
+from index_reloader import IndexReloader
+from fuzzy_index import FuzzyIndex
 import sys
+import threading
+from query_metrics import QueryMetrics, traced
 from text_processor import TextProcessor
 
 class Query:
@@ -13,8 +20,14 @@ class Query:
         self.all_relevances = {} # dict mapping words -> dicts mapping ids -> relevances
         self.page_ranks = {} # dict mapping ids -> page ranks
         self.document_scores = {} # dict mapping ids -> scores
+        self.postings = {} # dict mapping words -> doc-id-sorted lists of ids, built by build_postings
+        self.fuzzy_index = None # FuzzyIndex over the vocabulary, built by build_fuzzy_index
+        self.fuzzy_index_builder = None # thread building the fuzzy index in the background, if any
+        self.fuzzy_index_timeout = 5.0 # seconds a query with an unknown term waits for the fuzzy index
+        self.metrics = None # QueryMetrics that stage timings are recorded to, or None to disable tracing
 
 
+    @traced("calculate_scores")
     def calculate_scores(self, processed_tokens: "list[str]", use_page_rank: bool):
         '''
         Calculates scores by summing the term-document scores for all terms in the query
@@ -36,7 +49,223 @@ class Query:
             else:
                 self.document_scores[doc_id] = score
 
+        self.record_work(processed_tokens)
 
+
+    def build_postings(self):
+        ''' Builds the doc-id-sorted postings list of every term in the loaded vocabulary '''
+
+        self.postings = { word: sorted(ids_to_relevance) for (word, ids_to_relevance) in self.all_relevances.items() }
+
+
+    def build_fuzzy_index(self):
+        ''' Builds the fuzzy index used to correct misspelled query terms from the loaded vocabulary '''
+
+        fuzzy_index = FuzzyIndex()
+        fuzzy_index.build(self.all_relevances)
+        # only publish the fuzzy index once it is complete, so queries never see a partial one
+        self.fuzzy_index = fuzzy_index
+
+
+    def build_fuzzy_index_in_background(self):
+        '''
+        Builds the fuzzy index on a background thread, so that the first prompt does not wait
+        for it. A query with an unknown term waits for it in expand_terms
+        '''
+
+        self.fuzzy_index_builder = threading.Thread(target=self.build_fuzzy_index, daemon=True)
+        self.fuzzy_index_builder.start()
+
+
+    @traced("expand_terms")
+    def expand_terms(self, processed_tokens: "list[str]", max_expansions: int, \
+        keep_unmatched: bool = False) -> "list[str]":
+        '''
+        Replaces every term missing from the vocabulary with its nearest vocabulary terms
+
+        Parameters:
+        processed_tokens (list[str]) -- stemmed terms in the query
+        max_expansions (int) -- maximum number of vocabulary terms an unknown term expands to
+        keep_unmatched (bool) -- whether an unknown term with no nearby vocabulary terms is kept
+        (so that a required term still matches nothing) or dropped
+
+        Returns:
+        (list[str]) -- the terms with unknown terms expanded
+        '''
+
+        if self.fuzzy_index is None and self.fuzzy_index_builder is not None and \
+            any(word not in self.all_relevances for word in processed_tokens):
+            self.fuzzy_index_builder.join(self.fuzzy_index_timeout)
+            if self.fuzzy_index is None:
+                print("SPELLING CORRECTION IS STILL LOADING. MISSPELLED TERMS WERE NOT CORRECTED.")
+
+        if self.fuzzy_index is None:
+            return processed_tokens
+
+        expanded = []
+
+        for word in processed_tokens:
+            if word in self.all_relevances:
+                expanded.append(word)
+            else:
+                suggestions = self.fuzzy_index.lookup(word, max_expansions)
+                if len(suggestions) == 0 and keep_unmatched:
+                    expanded.append(word)
+                expanded.extend(suggestions)
+
+        return expanded
+
+
+    def get_postings(self, word: str) -> "list[int]":
+        '''
+        Produces the doc-id-sorted postings list for a term
+
+        Parameters:
+        word (str) -- stemmed term to look up
+
+        Returns:
+        (list[int]) -- sorted ids of the documents containing the term
+        '''
+
+        return self.postings.get(word, [])
+
+
+    def parse_query(self, query: str, processor: TextProcessor) -> "tuple[list[str], list[str], list[str]]":
+        '''
+        Parses a raw query into required, optional and excluded terms. Operators are
+        the upper-case words AND, OR and NOT, and the prefixes + (required) and - (excluded).
+        Terms on either side of an AND are required, terms following a NOT are excluded,
+        and all other terms are optional (the default OR behaviour)
+
+        Parameters:
+        query (str) -- raw query entered by the user
+        processor (TextProcessor) -- processor used to tokenize, filter and stem terms
+
+        Returns:
+        (tuple[list[str], list[str], list[str]]) -- required, optional and excluded stemmed terms
+        '''
+
+        required = []
+        optional = []
+        excluded = []
+        previous_terms = []
+        previous_is_optional = False
+        pending_and = False
+        pending_not = False
+
+        for piece in query.split():
+            if piece == "AND":
+                if previous_is_optional:
+                    del optional[len(optional) - len(previous_terms):]
+                    required.extend(previous_terms)
+                    previous_is_optional = False
+                pending_and = True
+                continue
+            if piece == "OR":
+                continue
+            if piece == "NOT":
+                pending_not = True
+                continue
+
+            modifier = piece[0]
+            if modifier in "+-":
+                piece = piece[1:]
+
+            with self.trace("tokenize"):
+                tokens = processor.tokenize(piece)
+            with self.trace("stem"):
+                terms = [processor.stem_word(token) for token in tokens if not processor.is_stop_word(token)]
+
+            if modifier == "-" or (pending_not and modifier != "+"):
+                excluded.extend(terms)
+                previous_is_optional = False
+            elif modifier == "+" or pending_and:
+                required.extend(terms)
+                previous_is_optional = False
+            else:
+                optional.extend(terms)
+                previous_is_optional = True
+
+            previous_terms = terms
+            pending_and = False
+            pending_not = False
+
+        return required, optional, excluded
+
+
+    @traced("calculate_scores")
+    def calculate_boolean_scores(self, required: "list[str]", optional: "list[str]", \
+        excluded: "list[str]", use_page_rank: bool):
+        '''
+        Calculates scores for a boolean query. Candidates are the intersection of the
+        required terms' postings (or the union of the optional terms' postings if nothing
+        is required) minus the excluded terms' postings, and only candidates are scored
+
+        Parameters:
+        required (list[str]) -- terms every matching document must contain
+        optional (list[str]) -- terms that add to the score but are not required
+        excluded (list[str]) -- terms no matching document may contain
+        use_page_rank (bool) -- whether to include pagerank or not in scoring
+        '''
+
+        if len(required) > 0:
+            candidates = postings.intersect([self.get_postings(word) for word in set(required)])
+        else:
+            candidates = postings.union([self.get_postings(word) for word in set(optional)])
+
+        # galloping through each excluded list costs work proportional to the candidates,
+        # not to the length of the excluded list
+        for word in set(excluded):
+            if len(candidates) == 0:
+                break
+            candidates = postings.subtract(candidates, self.get_postings(word))
+
+        self.document_scores = {}
+        scored_words = [word for word in required + optional if word in self.all_relevances]
+
+        for doc_id in candidates:
+            score = 0
+
+            for word in scored_words:
+                score += self.all_relevances[word].get(doc_id, 0)
+
+            if use_page_rank:
+                self.document_scores[doc_id] = score * self.page_ranks[doc_id]
+            else:
+                self.document_scores[doc_id] = score
+
+        self.record_work(required + optional + excluded)
+
+
+    def trace(self, stage: str):
+        '''
+        Produces a context manager timing a stage of the current query if tracing is enabled
+
+        Parameters:
+        stage (str) -- name of the stage
+        '''
+
+        if self.metrics is None:
+            return contextlib.nullcontext()
+
+        return self.metrics.stage(stage)
+
+
+    def record_work(self, words: "list[str]"):
+        '''
+        Records the postings list sizes of the scored terms and the number of candidate
+        documents if tracing is enabled
+
+        Parameters:
+        words (list[str]) -- terms the query was scored with
+        '''
+
+        if self.metrics is not None:
+            self.metrics.record_work({ word: len(self.all_relevances.get(word, {})) for word in words }, \
+                len(self.document_scores))
+
+
+    @traced("rank_documents")
     def rank_documents(self) -> "list[int]":
         ''' 
         Prints and returns the 10 highest-scored documents matching with the query 
@@ -74,35 +303,69 @@ class Query:
 
 if __name__ == "__main__":
     try:
-        q = Query()
-
-        if len(sys.argv) == 5:
-            file_io.read_title_file(sys.argv[2], q.ids_to_titles)
-            file_io.read_docs_file(sys.argv[3], q.page_ranks)
-            file_io.read_words_file(sys.argv[4], q.all_relevances)
-        elif len(sys.argv) == 4:        
-            file_io.read_title_file(sys.argv[1], q.ids_to_titles)
-            file_io.read_docs_file(sys.argv[2], q.page_ranks)
-            file_io.read_words_file(sys.argv[3], q.all_relevances)
-        else:
+        flags = [arg for arg in sys.argv[1:] if arg.startswith("--")]
+        index_files = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+
+        if len(index_files) != 3:
             print("Incorrect input, try again")
             quit()
-        
-        query = input("search> ")
-        processor = TextProcessor()
 
-        while query != ":quit":
-            all_tokens = processor.tokenize(query) 
-            processed_tokens = [processor.stem_word(token) for token in all_tokens \
-                if not processor.is_stop_word(token)]
-            use_page_rank = False
+        reloader = IndexReloader(Query, index_files[0], index_files[1], index_files[2])
+        reloader.reload()
 
-            if "--pagerank" in sys.argv:
-                use_page_rank = True
+        if "--watch" in flags:
+            reloader.start()
 
-            q.calculate_scores(processed_tokens, use_page_rank)
-            q.rank_documents()
+        metrics = None
+        metrics_path = [flag[len("--metrics="):] for flag in flags if flag.startswith("--metrics=")]
+
+        try:
+            if len(metrics_path) > 0:
+                metrics = QueryMetrics(open(metrics_path[0], "a"))
+
+            processor = TextProcessor()
+            # the stems the indexer computed let common query words skip loading NLTK's stemmer
+            if os.path.exists(index_files[2] + ".stems"):
+                file_io.read_stems_file(index_files[2] + ".stems", processor.stems)
 
             query = input("search> ")
+
+            while query != ":quit":
+                # each query runs against the index current when it starts, even if a newer one is swapped in
+                q = reloader.get_query()
+                q.metrics = metrics
+                if metrics is not None:
+                    metrics.start_query(query)
+                required, optional, excluded = q.parse_query(query, processor)
+                # a misspelled required or excluded term stands for its single nearest term
+                required = q.expand_terms(required, 1, True)
+                optional = q.expand_terms(optional, 3)
+                excluded = q.expand_terms(excluded, 1)
+                use_page_rank = False
+
+                if "--pagerank" in flags:
+                    use_page_rank = True
+
+                if len(required) > 0 or len(excluded) > 0:
+                    q.calculate_boolean_scores(required, optional, excluded, use_page_rank)
+                else:
+                    q.calculate_scores(optional, use_page_rank)
+                q.rank_documents()
+                if metrics is not None:
+                    metrics.end_query()
+
+                query = input("search> ")
+        except (EOFError, KeyboardInterrupt):
+            # Ctrl-D and Ctrl-C quit like ":quit"
+            print()
+        finally:
+            reloader.stop()
+            if metrics is not None:
+                metrics.dump(metrics.log_fh)
+                metrics.log_fh.close()
+                summary = metrics.summary()
+                print("%d queries, p50 %.2fms, p95 %.2fms, p99 %.2fms" % (summary["queries"], \
+                    summary["latency_ms"]["p50"], summary["latency_ms"]["p95"], summary["latency_ms"]["p99"]), \
+                    file=sys.stderr)
     except IOError:
-        print("Incorrect input, try again")
\ No newline at end of file
+        print("Incorrect input, try again")
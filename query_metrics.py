@@ -0,0 +1,230 @@
+import functools
+import heapq
+import json
+import time
+from contextlib import contextmanager
+
+# upper bounds, in milliseconds, of the latency histogram buckets
+BUCKET_BOUNDS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+
+def traced(stage: str):
+    '''
+    Decorates a Query method so that its running time is recorded as a stage of the
+    current query whenever the Query has metrics attached
+
+    Parameters:
+    stage (str) -- name of the stage the method's running time is recorded under
+    '''
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.metrics is None:
+                return method(self, *args, **kwargs)
+            with self.metrics.stage(stage):
+                return method(self, *args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+class QueryMetrics:
+    ''' Class for recording per-stage query timings and aggregating them into latency statistics '''
+
+    def __init__(self, log_fh = None, slow_query_count: int = 10):
+        '''
+        Constructor for QueryMetrics
+
+        Parameters:
+        log_fh (file) -- file that a JSON line is written to for every query, or None
+        slow_query_count (int) -- number of slowest queries kept for the summary
+        '''
+
+        self.log_fh = log_fh
+        self.slow_query_count = slow_query_count
+        self.latencies = [] # list of query latencies in seconds
+        self.stage_latencies = {} # dict mapping stages -> lists of per-query seconds
+        self.slow_queries = [] # min-heap of (latency, sequence number, record) for the slowest queries
+        self.first_start = None # time the first query started
+        self.last_end = None # time the last query ended
+        self.current = None # record of the query being traced
+        self.current_start = None # time the query being traced started
+
+
+    def start_query(self, query: str):
+        '''
+        Starts tracing a query
+
+        Parameters:
+        query (str) -- raw query entered by the user
+        '''
+
+        self.current = { "query": query, "stages": {}, "postings": {}, "postings_touched": 0, "candidates": 0 }
+        self.current_start = time.perf_counter()
+        if self.first_start is None:
+            self.first_start = self.current_start
+
+
+    @contextmanager
+    def stage(self, name: str):
+        '''
+        Times a stage of the query being traced, adding to the stage's time if it runs more than once
+
+        Parameters:
+        name (str) -- name of the stage
+        '''
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.current is not None:
+                stages = self.current["stages"]
+                stages[name] = stages.get(name, 0) + time.perf_counter() - start
+
+
+    def record_work(self, term_postings: "dict[str, int]", candidates: int):
+        '''
+        Records how much of the index the query being traced touched
+
+        Parameters:
+        term_postings (dict[str, int]) -- dict mapping scored terms -> lengths of their postings lists
+        candidates (int) -- number of candidate documents scored
+        '''
+
+        if self.current is None:
+            return
+
+        self.current["postings"].update(term_postings)
+        self.current["postings_touched"] += sum(term_postings.values())
+        self.current["candidates"] += candidates
+
+
+    def end_query(self):
+        ''' Finishes tracing the current query, adding it to the statistics and the log '''
+
+        if self.current is None:
+            return
+
+        self.last_end = time.perf_counter()
+        record = self.current
+        record["latency"] = self.last_end - self.current_start
+        self.current = None
+
+        self.latencies.append(record["latency"])
+        for name, seconds in record["stages"].items():
+            self.stage_latencies.setdefault(name, []).append(seconds)
+
+        entry = (record["latency"], len(self.latencies), record)
+        if len(self.slow_queries) < self.slow_query_count:
+            heapq.heappush(self.slow_queries, entry)
+        elif self.slow_query_count > 0:
+            heapq.heappushpop(self.slow_queries, entry)
+
+        if self.log_fh is not None:
+            self.log_fh.write(json.dumps({ "event": "query", **record }) + "\n")
+
+
+    def percentile(self, values: "list[float]", p: float) -> float:
+        '''
+        Calculates a percentile using the nearest-rank method
+
+        Parameters:
+        values (list[float]) -- values to take the percentile of
+        p (float) -- percentile between 0 and 100
+
+        Returns:
+        (float) -- the percentile, or 0 if there are no values
+        '''
+
+        if len(values) == 0:
+            return 0
+
+        ordered = sorted(values)
+        rank = max(1, -(-len(ordered) * p // 100))
+
+        return ordered[int(rank) - 1]
+
+
+    def histogram(self, values: "list[float]") -> "dict[str, int]":
+        '''
+        Counts latencies into buckets
+
+        Parameters:
+        values (list[float]) -- latencies in seconds
+
+        Returns:
+        (dict[str, int]) -- dict mapping bucket upper bounds in milliseconds -> counts
+        '''
+
+        buckets = { "<=" + str(bound) + "ms": 0 for bound in BUCKET_BOUNDS }
+        buckets[">" + str(BUCKET_BOUNDS[-1]) + "ms"] = 0
+
+        for value in values:
+            ms = value * 1000
+            for bound in BUCKET_BOUNDS:
+                if ms <= bound:
+                    buckets["<=" + str(bound) + "ms"] += 1
+                    break
+            else:
+                buckets[">" + str(BUCKET_BOUNDS[-1]) + "ms"] += 1
+
+        return buckets
+
+
+    def latency_summary(self, values: "list[float]") -> "dict[str, float]":
+        '''
+        Summarizes latencies by their percentiles in milliseconds
+
+        Parameters:
+        values (list[float]) -- latencies in seconds
+
+        Returns:
+        (dict[str, float]) -- dict mapping p50, p95, p99 and max -> milliseconds
+        '''
+
+        return {
+            "p50": self.percentile(values, 50) * 1000,
+            "p95": self.percentile(values, 95) * 1000,
+            "p99": self.percentile(values, 99) * 1000,
+            "max": max(values, default=0) * 1000,
+        }
+
+
+    def summary(self) -> dict:
+        '''
+        Aggregates every traced query into latency statistics
+
+        Returns:
+        (dict) -- query count, queries per second, latency percentiles and histogram,
+        per-stage percentiles, and the slowest queries with their terms' postings sizes
+        '''
+
+        count = len(self.latencies)
+        busy = sum(self.latencies)
+        wall = 0 if self.first_start is None else self.last_end - self.first_start
+
+        return {
+            "event": "summary",
+            "queries": count,
+            # throughput over the whole session, including time spent waiting for input
+            "qps": count / wall if wall > 0 else 0,
+            # throughput if queries ran back to back
+            "busy_qps": count / busy if busy > 0 else 0,
+            "latency_ms": self.latency_summary(self.latencies),
+            "histogram": self.histogram(self.latencies),
+            "stages_ms": { name: self.latency_summary(values) for (name, values) in self.stage_latencies.items() },
+            "slowest": [record for (_, _, record) in sorted(self.slow_queries, reverse=True)],
+        }
+
+
+    def dump(self, fh):
+        '''
+        Writes the summary as a JSON line
+
+        Parameters:
+        fh (file) -- file to write the summary to
+        '''
+
+        fh.write(json.dumps(self.summary()) + "\n")
@@ -0,0 +1,104 @@
+"""
+Measures how long query.py takes from process start to its first "search> " prompt,
+and to its answer to a first query (so that work deferred past the prompt is counted).
+The "eager" runs import NLTK and load its stopwords corpus before starting the querier,
+reproducing the startup cost of the previous text processor, and the "lazy" runs start
+the querier as it is now
+usage:
+python3 startup_benchmark.py <titles filepath> <docs filepath> <words filepath> [runs] [query]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+QUERY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "query.py")
+
+EAGER_PRELUDE = """
+import os, runpy, sys
+from nltk.stem import PorterStemmer
+from nltk.corpus import stopwords
+set(stopwords.words("english"))
+PorterStemmer()
+sys.argv = sys.argv[1:]
+sys.path.insert(0, os.path.dirname(sys.argv[0]))
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+
+def read_until_prompt(process: subprocess.Popen) -> bytes:
+    """
+    Reads a querier's output until it prompts for a query
+    :param process: running querier
+    :return: output up to and including the prompt
+    """
+    output = b""
+
+    while not output.endswith(b"search> "):
+        data = os.read(process.stdout.fileno(), 4096)
+        if len(data) == 0:
+            process.wait()
+            raise RuntimeError("querier exited before prompting: " + output.decode())
+        output += data
+
+    return output
+
+
+def time_to_first_answer(command: "list[str]", query: str) -> "tuple[float, float]":
+    """
+    Starts a querier, waits for its first prompt, runs one query and then quits it
+    :param command: command that starts the querier
+    :param query: first query to run
+    :return: seconds from starting the process to its first prompt, and to the
+    prompt after its answer to the query
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    read_until_prompt(process)
+    prompt_elapsed = time.perf_counter() - start
+
+    process.stdin.write(query.encode() + b"\n")
+    process.stdin.flush()
+    read_until_prompt(process)
+    answer_elapsed = time.perf_counter() - start
+
+    process.communicate(b":quit\n")
+
+    return prompt_elapsed, answer_elapsed
+
+
+def report(name: str, timings: "list[float]"):
+    """
+    Prints the median, minimum and maximum of a list of timings in milliseconds
+    :param name: label for the timings
+    :param timings: timings in seconds
+    :return: n/a
+    """
+    print("%-6s median %8.1fms  min %8.1fms  max %8.1fms" % \
+        (name, statistics.median(timings) * 1000, min(timings) * 1000, max(timings) * 1000))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4 or len(sys.argv) > 6:
+        print("Incorrect input, try again")
+        quit()
+
+    index_files = sys.argv[1:4]
+    runs = int(sys.argv[4]) if len(sys.argv) >= 5 else 5
+    query = sys.argv[5] if len(sys.argv) == 6 else "computer science"
+
+    lazy_command = [sys.executable, "-u", QUERY_PATH] + index_files
+    eager_command = [sys.executable, "-u", "-c", EAGER_PRELUDE, QUERY_PATH] + index_files
+
+    eager = [time_to_first_answer(eager_command, query) for _ in range(runs)]
+    lazy = [time_to_first_answer(lazy_command, query) for _ in range(runs)]
+
+    print("time to first prompt over", runs, "runs")
+    report("eager", [prompt for (prompt, _) in eager])
+    report("lazy", [prompt for (prompt, _) in lazy])
+    print("time to answer of first query \"" + query + "\" over", runs, "runs")
+    report("eager", [answer for (_, answer) in eager])
+    report("lazy", [answer for (_, answer) in lazy])
@@ -0,0 +1,57 @@
+import random
+import tracemalloc
+import file_io
+
+def write_random_edges(path: str, count: int, chunk_size: int) -> "tuple[list, int]":
+    ''' Writes count random edges to path, returning them and the peak memory used while writing '''
+
+    random.seed(count)
+    edges = [(random.randrange(1000000), random.randrange(1000000)) for _ in range(count)]
+
+    tracemalloc.start()
+    file_io.write_edges_file(path, iter(edges), chunk_size)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return edges, peak
+
+
+def test_write_edges_file(tmp_path):
+    ''' Tests that write_edges_file() sorts edges by destination, then source '''
+
+    path = str(tmp_path / "edges")
+
+    for chunk_size in [1, 3, 1000]:
+        file_io.write_edges_file(path, iter([(2, 1), (0, 2), (1, 1), (3, 0), (0, 1)]), chunk_size)
+        assert list(file_io.read_edge_pairs(path)) == [(3, 0), (0, 1), (1, 1), (2, 1), (0, 2)]
+
+    file_io.write_edges_file(path, iter([]), 1)
+    assert list(file_io.read_edge_pairs(path)) == []
+    assert sorted(tmp_path.iterdir()) == [tmp_path / "edges"]
+
+
+def test_write_edges_file_memory(tmp_path):
+    ''' Tests that write_edges_file() memory depends on chunk_size and not on the number of edges '''
+
+    path = str(tmp_path / "edges")
+
+    # both spill more than MAX_MERGE_RUNS sorted runs, the larger one 4x as many
+    small_edges, small_peak = write_random_edges(path, 20000, 200)
+    assert list(file_io.read_edge_pairs(path)) == sorted(small_edges, key=lambda edge: (edge[1], edge[0]))
+
+    large_edges, large_peak = write_random_edges(path, 80000, 200)
+    assert list(file_io.read_edge_pairs(path)) == sorted(large_edges, key=lambda edge: (edge[1], edge[0]))
+
+    assert large_peak < 1.5 * small_peak
+    assert sorted(tmp_path.iterdir()) == [tmp_path / "edges"]
+
+
+def test_stems_file(tmp_path):
+    ''' Tests that read_stems_file() reads back the stems written by write_stems_file() '''
+
+    path = str(tmp_path / "words.txt.stems")
+    file_io.write_stems_file(path, { "involves": "involv", "computer": "comput", "easiest": "easiest" })
+
+    stems = {}
+    file_io.read_stems_file(path, stems)
+    assert stems == { "involves": "involv", "computer": "comput", "easiest": "easiest" }
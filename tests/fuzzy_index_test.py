@@ -0,0 +1,50 @@
+from fuzzy_index import FuzzyIndex
+
+def test_generate_deletes():
+    ''' Tests the generate_deletes() function '''
+
+    fuzzy = FuzzyIndex(max_distance=1)
+    assert fuzzy.generate_deletes("abc") == { "abc", "bc", "ac", "ab" }
+
+    fuzzy = FuzzyIndex(max_distance=2)
+    assert fuzzy.generate_deletes("ab") == { "ab", "a", "b", "" }
+
+
+def test_edit_distance():
+    ''' Tests the edit_distance() function '''
+
+    fuzzy = FuzzyIndex()
+
+    assert fuzzy.edit_distance("comput", "comput", 2) == 0
+    assert fuzzy.edit_distance("comput", "compt", 2) == 1
+    assert fuzzy.edit_distance("comput", "cmoput", 2) == 1
+    assert fuzzy.edit_distance("comput", "kompat", 2) == 2
+    assert fuzzy.edit_distance("comput", "science", 2) == 3
+    assert fuzzy.edit_distance("a", "abcdef", 2) == 3
+
+
+def test_lookup():
+    ''' Tests the lookup() function '''
+
+    fuzzy = FuzzyIndex()
+    fuzzy.build({ "comput": { 1: 0.5, 2: 0.5 }, "compot": { 3: 0.1 }, "scienc": { 1: 0.2 }, "art": { 2: 0.3 } })
+
+    # only the suggestions tied at the smallest distance are returned
+    assert fuzzy.lookup("comput") == ["comput"]
+    assert fuzzy.lookup("compt") == ["comput", "compot"]
+    assert fuzzy.lookup("compt", max_expansions=1) == ["comput"]
+    assert fuzzy.lookup("sceinc") == ["scienc"]
+    assert fuzzy.lookup("xyzzy") == []
+
+    # no lookups allowed means no suggestions
+    assert fuzzy.lookup("compt", max_lookups=0) == []
+
+
+def test_lookup_prefix():
+    ''' Tests that lookup() finds terms whose misspelling is past the prefix '''
+
+    fuzzy = FuzzyIndex(prefix_length=3)
+    fuzzy.build({ "abcdefgh": { 1: 1.0 }, "abcxyz": { 2: 1.0 } })
+
+    assert fuzzy.lookup("abcdefhg") == ["abcdefgh"]
+    assert fuzzy.lookup("bcxyz") == ["abcxyz"]
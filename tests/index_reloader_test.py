@@ -0,0 +1,142 @@
+import os
+import time
+import file_io
+from index_reloader import IndexReloader
+from query import Query
+
+def write_index(tmp_path, title: str, word: str):
+    ''' Writes a single-document index whose only word is word, then its generation marker '''
+
+    (tmp_path / "titles.txt").write_text("1::" + title + "\n")
+    (tmp_path / "docs.txt").write_text("1 1.0\n")
+    (tmp_path / "words.txt").write_text(word + " 1 0.5 \n")
+    file_io.write_generation_file(str(tmp_path / "words.txt.generation"), \
+        [str(tmp_path / name) for name in ["titles.txt", "docs.txt", "words.txt"]])
+
+
+def make_reloader(tmp_path) -> IndexReloader:
+    ''' Creates a reloader over the index files in tmp_path '''
+
+    return IndexReloader(Query, str(tmp_path / "titles.txt"), str(tmp_path / "docs.txt"), \
+        str(tmp_path / "words.txt"), 0.01)
+
+
+def test_poll(tmp_path):
+    ''' Tests that poll() swaps in a new generation only once its generation marker is written '''
+
+    write_index(tmp_path, "old", "aa")
+    reloader = make_reloader(tmp_path)
+    reloader.reload()
+    old = reloader.get_query()
+
+    assert old.ids_to_titles == { 1: "old" }
+    old.fuzzy_index_builder.join()
+    assert old.fuzzy_index is not None
+    assert reloader.poll() == False
+
+    # the indexer has rewritten the titles file but not yet the others or the marker
+    (tmp_path / "titles.txt").write_text("1::newer\n")
+    assert reloader.index_generation() is None
+    assert reloader.poll() == False
+    assert reloader.get_query() is old
+
+    write_index(tmp_path, "newer", "bbb")
+    assert reloader.poll() == True
+
+    new = reloader.get_query()
+    assert new is not old
+    assert new.ids_to_titles == { 1: "newer" }
+    assert new.all_relevances == { "bbb": { 1: 0.5 } }
+    # later generations are loaded off the prompt path, so their fuzzy index is ready when swapped in
+    assert new.fuzzy_index is not None
+    assert new.fuzzy_index_builder is None
+    assert len(reloader.reload_times) == 2
+
+    # a query holding the old index still answers from it
+    old.calculate_scores(["aa"], False)
+    assert old.document_scores == { 1: 0.5 }
+
+    # a generation that fails to load keeps the current index
+    write_index(tmp_path, "newest", "cc")
+    (tmp_path / "words.txt").write_text("cc 1 not-a-number \n")
+    file_io.write_generation_file(str(tmp_path / "words.txt.generation"), \
+        [str(tmp_path / name) for name in ["titles.txt", "docs.txt", "words.txt"]])
+    assert reloader.poll() == False
+    assert reloader.get_query() is new
+    assert reloader.poll() == False
+
+    # titles and docs files that disagree are not swapped in
+    write_index(tmp_path, "newest", "cc")
+    (tmp_path / "docs.txt").write_text("2 1.0\n")
+    file_io.write_generation_file(str(tmp_path / "words.txt.generation"), \
+        [str(tmp_path / name) for name in ["titles.txt", "docs.txt", "words.txt"]])
+    assert reloader.poll() == False
+    assert reloader.get_query() is new
+
+
+def test_reload_changed_while_loading(tmp_path):
+    ''' Tests that reload() keeps the old index if the index files change while it is loading '''
+
+    write_index(tmp_path, "old", "aa")
+    reloader = make_reloader(tmp_path)
+    reloader.reload()
+    old = reloader.get_query()
+    write_index(tmp_path, "newer", "bbb")
+
+    def rewriting_factory():
+        # the indexer starts writing the next generation while this one loads
+        (tmp_path / "titles.txt").write_text("1::newest\n")
+        return Query()
+
+    reloader.query_factory = rewriting_factory
+    assert reloader.poll() == False
+    assert reloader.get_query() is old
+
+    reloader.query_factory = Query
+    write_index(tmp_path, "newest", "cc")
+    assert reloader.poll() == True
+    assert reloader.get_query().ids_to_titles == { 1: "newest" }
+
+
+def test_resident_memory(tmp_path):
+    ''' Tests the resident_memory() function '''
+
+    memory = make_reloader(tmp_path).resident_memory()
+
+    if os.path.exists("/proc/self/statm"):
+        assert memory > 0
+    else:
+        assert memory is None
+
+
+def test_watch(tmp_path):
+    ''' Tests that the background thread swaps in a new generation and survives errors '''
+
+    write_index(tmp_path, "old", "aa")
+    reloader = make_reloader(tmp_path)
+    reloader.reload()
+
+    # an unexpected error in one poll is logged and the watcher keeps polling
+    poll = reloader.poll
+    errors = []
+    def failing_poll():
+        if len(errors) == 0:
+            errors.append(True)
+            raise RuntimeError("poll failed")
+        return poll()
+    reloader.poll = failing_poll
+    reloader.start()
+
+    try:
+        write_index(tmp_path, "newer", "bbb")
+        deadline = time.time() + 5
+
+        while reloader.get_query().ids_to_titles != { 1: "newer" } and time.time() < deadline:
+            time.sleep(0.01)
+
+        assert reloader.get_query().ids_to_titles == { 1: "newer" }
+        assert errors == [True]
+    finally:
+        reloader.stop()
+
+    assert reloader.thread is None
@@ -1,4 +1,6 @@
 import pytest
+import sys
+import file_io
 from index import Index
 
 def test_process_text():
@@ -193,9 +195,86 @@ def test_euclidean_distance():
     assert index.euclidean_distance(v1, v2) - 11.357816 < 0.01
 
 
+def test_process_xml_on_disk(tmp_path, monkeypatch):
+    ''' Tests that process_xml() with an edges file spills links instead of keeping page_weights '''
+
+    xml = tmp_path / "wiki.xml"
+    xml.write_text("<xml>" \
+        "<page><title>A</title><id>1</id><text>[[b]] [[c]] [[b|bee]] [[outside]]</text></page>" \
+        "<page><title>B</title><id>2</id><text>[[a]] [[b]]</text></page>" \
+        "<page><title>C</title><id>3</id><text>[[a]]</text></page>" \
+        "<page><title>D</title><id>4</id><text>no links</text></page>" \
+        "</xml>")
+    monkeypatch.setattr(sys, "argv", ["index.py", str(xml)])
+
+    in_memory = Index()
+    in_memory.process_xml()
+
+    on_disk = Index()
+    on_disk.edges_file = str(tmp_path / "edges")
+    on_disk.process_xml()
+
+    assert on_disk.page_weights == {}
+    assert on_disk.all_relevances == in_memory.all_relevances
+    for doc_id in in_memory.page_ranks:
+        assert pytest.approx(in_memory.page_ranks[doc_id]) == on_disk.page_ranks[doc_id]
+    assert list(file_io.read_edge_pairs(str(tmp_path / "edges"))) == [(1, 0), (2, 0), (0, 1), (0, 2)]
+    assert sorted(tmp_path.iterdir()) == [tmp_path / "edges", xml]
+
+
 # function calls!
 test_process_text()
 test_extract_tokens_from_link()
 test_calculate_relevance()
 test_calculate_nk()
-test_calculate_weights()
\ No newline at end of file
+test_calculate_weights()
+
+def test_calculate_page_ranks_on_disk(tmp_path):
+    ''' Tests that calculate_page_ranks_on_disk() matches calculate_page_ranks() '''
+
+    graphs = [
+        {"A": {"C": None}, "B": {"D": None}, "C": {"D": None}, "D": {"A": None, "C": None}},
+        {"A": {"B": None, "C": None}, "B": {}, "C": {"A": None}},
+        {"A": {"A": None}, "B": {"B": None}, "C": {"C": None}, "D": {"D": None}, "E": {"E": None}},
+        {"A": {"F": None}, "B": {"F": None}, "C": {"F": None}, "D": {}, "E": {}},
+        {"A": {}},
+    ]
+
+    for graph in graphs:
+        titles_to_ids = { title: i + 1 for (i, title) in enumerate(graph) }
+
+        in_memory = Index()
+        in_memory.titles_to_ids = titles_to_ids
+        in_memory.page_weights = { k: dict(v) for (k, v) in graph.items() }
+        in_memory.calculate_page_ranks()
+
+        on_disk = Index()
+        on_disk.titles_to_ids = titles_to_ids
+        on_disk.page_weights = { k: dict(v) for (k, v) in graph.items() }
+        # a chunk size of 1 forces the edge list through the external merge sort
+        on_disk.calculate_page_ranks_on_disk(str(tmp_path / "edges"), 1)
+
+        assert on_disk.page_ranks.keys() == in_memory.page_ranks.keys()
+        for doc_id in in_memory.page_ranks:
+            assert pytest.approx(in_memory.page_ranks[doc_id]) == on_disk.page_ranks[doc_id]
+
+        # links spilled to a links file give the same ranks without page_weights
+        with open(tmp_path / "links", "w") as links_fh:
+            for title in graph:
+                file_io.write_links(links_fh, title, graph[title])
+        from_links = Index()
+        from_links.titles_to_ids = titles_to_ids
+        from_links.calculate_page_ranks_on_disk(str(tmp_path / "edges"), 1, str(tmp_path / "links"))
+        assert from_links.page_weights == {}
+        for doc_id in in_memory.page_ranks:
+            assert pytest.approx(in_memory.page_ranks[doc_id]) == from_links.page_ranks[doc_id]
+        (tmp_path / "links").unlink()
+
+    # the edge list is sorted by destination and skips self and outside links
+    assert list(file_io.read_edge_pairs(str(tmp_path / "edges"))) == []
+    index = Index()
+    index.titles_to_ids = { "A": 1, "B": 2, "C": 3 }
+    index.page_weights = { "A": { "B": None, "C": None, "A": None }, "B": { "A": None, "Z": None }, "C": { "A": None } }
+    index.calculate_page_ranks_on_disk(str(tmp_path / "edges"), 2)
+    assert list(file_io.read_edge_pairs(str(tmp_path / "edges"))) == [(1, 0), (2, 0), (0, 1), (0, 2)]
+    assert sorted(tmp_path.iterdir()) == [tmp_path / "edges"]
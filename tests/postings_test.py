@@ -0,0 +1,44 @@
+import postings
+
+def test_gallop_to():
+    ''' Tests the gallop_to() function '''
+
+    ids = [1, 3, 5, 7, 9, 11, 13]
+
+    assert postings.gallop_to(ids, 1, 0) == 0
+    assert postings.gallop_to(ids, 6, 0) == 3
+    assert postings.gallop_to(ids, 13, 2) == 6
+    assert postings.gallop_to(ids, 14, 0) == 7
+    assert postings.gallop_to(ids, 2, 4) == 4
+    assert postings.gallop_to([], 2, 0) == 0
+
+
+def test_intersect():
+    ''' Tests the intersect() function '''
+
+    assert postings.intersect([]) == []
+    assert postings.intersect([[1, 2, 3]]) == [1, 2, 3]
+    assert postings.intersect([[1, 2, 3], []]) == []
+    assert postings.intersect([[2, 4, 6, 8], [1, 2, 3, 4, 5, 6]]) == [2, 4, 6]
+
+    # long lists exercise the skip pointers
+    evens = list(range(0, 1000, 2))
+    threes = list(range(0, 1000, 3))
+    assert postings.intersect([evens, threes]) == list(range(0, 1000, 6))
+    assert postings.intersect([evens, threes, [6, 7, 996, 997]]) == [6, 996]
+
+
+def test_subtract():
+    ''' Tests the subtract() function '''
+
+    assert postings.subtract([1, 2, 3], []) == [1, 2, 3]
+    assert postings.subtract([], [1, 2]) == []
+    assert postings.subtract([1, 2, 3, 4], [2, 4, 6]) == [1, 3]
+    assert postings.subtract(list(range(100)), list(range(1, 100))) == [0]
+
+
+def test_union():
+    ''' Tests the union() function '''
+
+    assert postings.union([]) == []
+    assert postings.union([[1, 3], [2, 3], []]) == [1, 2, 3]
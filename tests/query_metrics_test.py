@@ -0,0 +1,70 @@
+import io
+import json
+from query_metrics import QueryMetrics
+
+def test_percentile():
+    ''' Tests the percentile() function '''
+
+    metrics = QueryMetrics()
+    values = [float(i) for i in range(1, 101)]
+
+    assert metrics.percentile([], 50) == 0
+    assert metrics.percentile([3.0], 99) == 3.0
+    assert metrics.percentile(values, 50) == 50.0
+    assert metrics.percentile(values, 95) == 95.0
+    assert metrics.percentile(values, 99) == 99.0
+    assert metrics.percentile(values, 100) == 100.0
+
+
+def test_histogram():
+    ''' Tests the histogram() function '''
+
+    metrics = QueryMetrics()
+    buckets = metrics.histogram([0.00005, 0.0002, 0.003, 0.003, 10.0])
+
+    assert buckets["<=0.1ms"] == 1
+    assert buckets["<=0.25ms"] == 1
+    assert buckets["<=5ms"] == 2
+    assert buckets[">5000ms"] == 1
+    assert sum(buckets.values()) == 5
+
+
+def test_trace_queries():
+    ''' Tests tracing queries through start_query(), stage(), record_work() and end_query() '''
+
+    log = io.StringIO()
+    metrics = QueryMetrics(log, slow_query_count=1)
+
+    metrics.start_query("cats")
+    with metrics.stage("tokenize"):
+        pass
+    with metrics.stage("tokenize"):
+        pass
+    metrics.record_work({ "cat": 4 }, 4)
+    metrics.end_query()
+
+    metrics.start_query("cats dogs")
+    metrics.record_work({ "cat": 4, "dog": 2 }, 5)
+    metrics.end_query()
+
+    lines = [json.loads(line) for line in log.getvalue().splitlines()]
+    assert [line["query"] for line in lines] == ["cats", "cats dogs"]
+    assert list(lines[0]["stages"]) == ["tokenize"]
+    assert lines[1]["postings"] == { "cat": 4, "dog": 2 }
+    assert lines[1]["postings_touched"] == 6
+    assert lines[1]["candidates"] == 5
+
+    summary = metrics.summary()
+    assert summary["queries"] == 2
+    assert summary["qps"] > 0
+    assert list(summary["stages_ms"]) == ["tokenize"]
+    assert len(summary["slowest"]) == 1
+    assert summary["slowest"][0]["latency"] == max(line["latency"] for line in lines)
+
+    metrics.dump(log)
+    assert json.loads(log.getvalue().splitlines()[-1])["event"] == "summary"
+
+    # work outside of a traced query is ignored
+    metrics.record_work({ "cat": 4 }, 4)
+    metrics.end_query()
+    assert metrics.summary()["queries"] == 2
@@ -1,5 +1,8 @@
 import pytest
+import threading
 from query import Query
+from query_metrics import QueryMetrics
+from text_processor import TextProcessor
 
 def test_calculate_scores():
     ''' Tests the calculate_scores() function '''
@@ -28,4 +31,153 @@ def test_calculate_scores():
     assert query.document_scores == { 1: 1.0986122886681098 * 2, 2: 0, 3: 0 } 
 
     query.calculate_scores(["aa", "cc"], False)
-    assert query.document_scores == {1: 1.0986122886681098, 2: 0.4054651081081644, 3: 0.27031007207210955 }
\ No newline at end of file
+    assert query.document_scores == {1: 1.0986122886681098, 2: 0.4054651081081644, 3: 0.27031007207210955 }
+
+def test_parse_query():
+    ''' Tests the parse_query() function '''
+
+    query = Query()
+    processor = TextProcessor()
+
+    assert query.parse_query("computers science", processor) == ([], ["comput", "scienc"], [])
+    assert query.parse_query("computers AND science", processor) == (["comput", "scienc"], [], [])
+    assert query.parse_query("computers OR science", processor) == ([], ["comput", "scienc"], [])
+    assert query.parse_query("computers NOT science", processor) == ([], ["comput"], ["scienc"])
+    assert query.parse_query("+computers -science art", processor) == (["comput"], ["art"], ["scienc"])
+    assert query.parse_query("art AND computers NOT science", processor) == (["art", "comput"], [], ["scienc"])
+    assert query.parse_query("the AND", processor) == ([], [], [])
+
+
+def test_calculate_boolean_scores():
+    ''' Tests the calculate_boolean_scores() function '''
+
+    query = Query()
+    query.all_relevances["aa"] = { 1: 1.0, 2: 0.5 }
+    query.all_relevances["bb"] = { 2: 0.25, 3: 0.75 }
+    query.all_relevances["cc"] = { 3: 0.5 }
+    query.ids_to_titles = { 1: "AA", 2: "BB", 3: "CC" }
+    query.page_ranks = { 1: 0.5, 2: 0.25, 3: 0.25 }
+    query.build_postings()
+    assert query.postings == { "aa": [1, 2], "bb": [2, 3], "cc": [3] }
+
+    query.calculate_boolean_scores(["aa", "bb"], [], [], False)
+    assert query.document_scores == { 2: 0.75 }
+
+    query.calculate_boolean_scores(["aa", "bb"], [], [], True)
+    assert query.document_scores == { 2: 0.75 * 0.25 }
+
+    query.calculate_boolean_scores(["bb"], ["cc"], [], False)
+    assert query.document_scores == { 2: 0.25, 3: 1.25 }
+
+    query.calculate_boolean_scores([], ["aa", "bb"], ["cc"], False)
+    assert query.document_scores == { 1: 1.0, 2: 0.75 }
+
+    query.calculate_boolean_scores(["aa"], [], ["bb"], False)
+    assert query.document_scores == { 1: 1.0 }
+
+    query.calculate_boolean_scores([], ["aa", "bb", "cc"], ["aa", "cc"], False)
+    assert query.document_scores == {}
+
+    query.calculate_boolean_scores([], ["bb", "cc"], ["aa"], False)
+    assert query.document_scores == { 3: 1.25 }
+
+    query.calculate_boolean_scores(["aa", "zz"], [], [], False)
+    assert query.document_scores == {}
+
+    query.calculate_boolean_scores([], [], ["aa"], False)
+    assert query.document_scores == {}
+
+
+def test_expand_terms():
+    ''' Tests the expand_terms() function '''
+
+    query = Query()
+    query.all_relevances["comput"] = { 1: 0.5 }
+    query.all_relevances["compot"] = { 2: 0.5, 3: 0.5 }
+    query.all_relevances["scienc"] = { 2: 0.25 }
+
+    # without a fuzzy index, terms are left alone
+    assert query.expand_terms(["compt", "scienc"], 3) == ["compt", "scienc"]
+
+    query.build_fuzzy_index()
+    assert query.expand_terms(["scienc"], 3) == ["scienc"]
+    assert query.expand_terms(["compt", "scienc"], 3) == ["compot", "comput", "scienc"]
+    assert query.expand_terms(["compt", "scienc"], 1) == ["compot", "scienc"]
+    assert query.expand_terms(["xyzzy"], 3) == []
+
+    # an unknown term waits for a fuzzy index being built in the background
+    query.fuzzy_index = None
+    query.build_fuzzy_index_in_background()
+    assert query.expand_terms(["compt"], 1) == ["compot"]
+    assert query.expand_terms(["xyzzy", "compt"], 1, True) == ["xyzzy", "compot"]
+
+    # a required term with no suggestions still makes the intersection empty
+    query.page_ranks = { 1: 1.0, 2: 1.0, 3: 1.0 }
+    query.build_postings()
+    query.calculate_boolean_scores(query.expand_terms(["comput", "xyzzy"], 1, True), [], [], False)
+    assert query.document_scores == {}
+
+
+def test_expand_terms_timeout(capsys):
+    ''' Tests that expand_terms() says so when the fuzzy index is not ready in time '''
+
+    query = Query()
+    query.all_relevances["comput"] = { 1: 0.5 }
+    query.fuzzy_index_timeout = 0
+    ready = threading.Event()
+    query.fuzzy_index_builder = threading.Thread(target=ready.wait)
+    query.fuzzy_index_builder.start()
+
+    # known terms never wait
+    assert query.expand_terms(["comput"], 1) == ["comput"]
+    assert capsys.readouterr().out == ""
+
+    assert query.expand_terms(["compt"], 1) == ["compt"]
+    assert "SPELLING CORRECTION IS STILL LOADING" in capsys.readouterr().out
+
+    ready.set()
+    query.fuzzy_index_builder.join()
+
+
+def test_expand_terms_ranking():
+    ''' Tests that a farther expansion of a misspelled term does not outrank the nearest one '''
+
+    query = Query()
+    query.all_relevances["comput"] = { 1: 0.5 }
+    query.all_relevances["compar"] = { 2: 2.0 }
+    query.all_relevances["compet"] = { 3: 1.5 }
+    query.ids_to_titles = { 1: "Computer", 2: "Comparative", 3: "Competition" }
+    query.page_ranks = { 1: 1 / 3, 2: 1 / 3, 3: 1 / 3 }
+    query.build_fuzzy_index()
+
+    # "comput" is 1 edit from "computr", while "compar" and "compet" are 2
+    expanded = query.expand_terms(["computr"], 3)
+    assert expanded == ["comput"]
+
+    query.calculate_scores(expanded, False)
+    assert query.rank_documents() == ["Computer"]
+
+
+def test_tracing():
+    ''' Tests that Query records stages and work to its metrics '''
+
+    query = Query()
+    query.all_relevances["aa"] = { 1: 1.0, 2: 0.5 }
+    query.all_relevances["bb"] = { 2: 0.25 }
+    query.ids_to_titles = { 1: "AA", 2: "BB" }
+    query.page_ranks = { 1: 0.5, 2: 0.5 }
+    query.build_postings()
+    query.metrics = QueryMetrics()
+    processor = TextProcessor()
+
+    query.metrics.start_query("aa AND bb")
+    required, optional, excluded = query.parse_query("aa AND bb", processor)
+    query.calculate_boolean_scores(required, optional, excluded, False)
+    query.rank_documents()
+    query.metrics.end_query()
+
+    record = query.metrics.summary()["slowest"][0]
+    assert set(record["stages"]) == { "tokenize", "stem", "calculate_scores", "rank_documents" }
+    assert record["postings"] == { "aa": 2, "bb": 1 }
+    assert record["postings_touched"] == 3
+    assert record["candidates"] == 1
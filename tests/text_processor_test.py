@@ -52,8 +52,24 @@ def test_stem_word():
     assert processor.stem_word("uninvolved") == "uninvolv"
     assert processor.stem_word("easiest") == "easiest"
 
+
+def test_stem_word_cache():
+    ''' Tests that stem_word() caches stems and only creates the stemmer when needed '''
+
+    processor = TextProcessor()
+    assert processor.stemmer is None
+
+    processor.stems["involves"] = "cached"
+    assert processor.stem_word("involves") == "cached"
+    assert processor.stemmer is None
+
+    assert processor.stem_word("involving") == "involv"
+    assert processor.stemmer is not None
+    assert processor.stems["involving"] == "involv"
+
 # function calls!
 test_tokenize()
 test_is_link()
 test_stem_word()
+test_stem_word_cache()
 test_is_stop_word()
\ No newline at end of file
@@ -1,6 +1,28 @@
 import re
-from nltk.stem import PorterStemmer
-from nltk.corpus import stopwords
+
+# NLTK's English stop words, frozen here so that NLTK is not imported and its stopwords
+# corpus is not read from disk every time a TextProcessor is created
+STOP_WORDS = frozenset({
+    "i", "me", "my", "myself", "we", "our", "ours", "ourselves", "you", "you're",
+    "you've", "you'll", "you'd", "your", "yours", "yourself", "yourselves", "he", "him",
+    "his", "himself", "she", "she's", "her", "hers", "herself", "it", "it's", "its",
+    "itself", "they", "them", "their", "theirs", "themselves", "what", "which", "who",
+    "whom", "this", "that", "that'll", "these", "those", "am", "is", "are", "was",
+    "were", "be", "been", "being", "have", "has", "had", "having", "do", "does", "did",
+    "doing", "a", "an", "the", "and", "but", "if", "or", "because", "as", "until",
+    "while", "of", "at", "by", "for", "with", "about", "against", "between", "into",
+    "through", "during", "before", "after", "above", "below", "to", "from", "up",
+    "down", "in", "out", "on", "off", "over", "under", "again", "further", "then",
+    "once", "here", "there", "when", "where", "why", "how", "all", "any", "both",
+    "each", "few", "more", "most", "other", "some", "such", "no", "nor", "not", "only",
+    "own", "same", "so", "than", "too", "very", "s", "t", "can", "will", "just", "don",
+    "don't", "should", "should've", "now", "d", "ll", "m", "o", "re", "ve", "y", "ain",
+    "aren", "aren't", "couldn", "couldn't", "didn", "didn't", "doesn", "doesn't",
+    "hadn", "hadn't", "hasn", "hasn't", "haven", "haven't", "isn", "isn't", "ma",
+    "mightn", "mightn't", "mustn", "mustn't", "needn", "needn't", "shan", "shan't",
+    "shouldn", "shouldn't", "wasn", "wasn't", "weren", "weren't", "won", "won't",
+    "wouldn", "wouldn't",
+})
 
 
 class TextProcessor:
@@ -9,8 +31,9 @@ class TextProcessor:
     def __init__(self):
         ''' Constructor for the TextProcessor class '''
 
-        self.STOP_WORDS = set(stopwords.words("english"))
-        self.stemmer = PorterStemmer()
+        self.STOP_WORDS = STOP_WORDS
+        self.stemmer = None # PorterStemmer, created the first time a word's stem is not cached
+        self.stems = {} # dict mapping words -> stems
         self.n_regex = '''\[\[[^\[]+?\]\]|[a-zA-Z0-9]+'[a-zA-Z0-9]+|[a-zA-Z0-9]+'''
 
 
@@ -25,7 +48,13 @@ class TextProcessor:
         (str) -- the stemmed word
         '''
 
-        return self.stemmer.stem(word)
+        if word not in self.stems:
+            if self.stemmer is None:
+                from nltk.stem import PorterStemmer
+                self.stemmer = PorterStemmer()
+            self.stems[word] = self.stemmer.stem(word)
+
+        return self.stems[word]
 
 
     def tokenize(self, text: str) -> "list[str]":